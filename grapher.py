@@ -1,134 +1,365 @@
 import r2pipe
-import matplotlib.pyplot as plt
+try:
+    import r2pipe.native as r2native
+except ImportError:
+    r2native = None
+import numpy as np
+import matplotlib
 import matplotlib.ticker as ticker
 import argparse
 import os
+import atexit
+import shutil
 import concurrent.futures
+import functools
+import json
+import multiprocessing.util
+from dataclasses import dataclass
 
-# Setup the argument parser
-parser = argparse.ArgumentParser(description="Analyzes specified lines of code by executing the code using the given input values, recording the output, and displaying the input and output in a graph.", usage='%(prog)s [options] filename start stop input output range')
-parser.add_argument("filename", help="The name of the executable you would like to analyze.")
-parser.add_argument("start", help="The first breakpoint will be set at this location. At the breakpoint, the input register or memory location will be changed to the next value in the range.")
-parser.add_argument("stop", help="The second breakpoint will be set at this location. At the breakpoint, the output will be recorded.")
-parser.add_argument("input", help="The register or memory location that contains the input value that should be bruteforced. Will be displayed on the x-axis. Example: \"eax\". If using a memory location, please specify the location using m[location]. Example: \"m[rbp-0x8]\".")
-parser.add_argument("output", help="The register or memory location that contains the output values that should be checked after the code is executed. Will be displayed on the y-axis. Example: \"eax\". If using a memory location, please specify the location using m[location]. Example: \"m[rbp-0x8]\".")
-parser.add_argument("range", help="The range of values that should be used for the input during the bruteforce process. Should be in the form \"[lower,upper]\" or \"[lower,upper,step]\". For example: [0,101,5] will use 0, 5, 10, ..., 95, 100 as the x values in the graph. These must be in base 10 (hexadecimal or binary will not work).")
-
-# Add optional arguments
-parser.add_argument("-t", "--threads", nargs='?', dest="threads", default="5", help="The number of threads that will be used during execution. Default value is 5.")
-parser.add_argument("-in", "--standard-input", nargs='?', dest='input_file', default='', help="Uses the \'dor stdin=[INPUT_FILE]\' command in radare2 to make the executable read standard input from a given file instead of having the user type it in.")
-parser.add_argument("-il", "--input-length", nargs='?', dest='input_length', default='1', help="The amount of bytes placed at the input memory location. Default value is 1, but this will be automatically adjusted if it is too small. Is only used if the input is a memory location and not a register.")
-parser.add_argument("-ol", "--output-length", nargs='?', dest='output_length', default='1', help="The amount of bytes read at the output memory location. Must be equal to either 1, 2, 4, or 8. Default value is 1. Is only used if the output is a memory location and not a register.")
-parser.add_argument("-e", "--execute", nargs='?', dest='commands', type=str, default='', help="Executes the given r2 commands in radare2 right after the debugger hits the first breakpoint, but before the input value is set. Example: -e \"dr ebx = 7\" will always set ebx equal to 7 at the first breakpoint. Multiple commands can be separated by a semicolon.")
-parser.add_argument("-hx", "--x-axis-hex", dest='x_is_hex', action='store_const', const=True, default=False, help="Displays the x-axis in hexadecimal instead of denary.")
-parser.add_argument("-hy", "--y-axis-hex", dest='y_is_hex', action='store_const', const=True, default=False, help="Displays the y-axis in hexadecimal instead of denary.")
-parser.add_argument("-j", "--jump", dest='jump', action='store_const', const=True, default=False, help="Instead of running all of the code that comes before the breakpoint, if this option is set, rip/eip will immidiately be set to the start value as soon as the program opens. This will essentially jump over any code that comes before the first breakpoint, and it will make the program only execute the code between the starting and stopping breakpoints.")
-
-# Parse all of the arguments
-args = parser.parse_args()
-filename = args.filename
-start = args.start
-stop = args.stop
-bruteforce = args.input
-bruteforceIsMem = False
-if(bruteforce.startswith("m[") and bruteforce[-1]==']'):
-    bruteforceIsMem = True
-    bruteforce = bruteforce[2:-1]
-output = args.output
-outputIsMem = False
-if(output.startswith("m[") and output[-1]==']'):
-    outputIsMem = True
-    output = output[2:-1]
-valueRange = args.range.split(",")
-lower_bound = int(valueRange[0].split("[")[1])
-upper_bound = valueRange[1]
-if("]" in upper_bound):
-    upper_bound = int(upper_bound[:-1])
-else:
-    upper_bound = int(upper_bound)
-step = 1
-if(len(valueRange) == 3):
-    step = int(valueRange[2][:-1])
-threads = int(args.threads)
-input_file = args.input_file
-input_length = args.input_length
-output_length = args.output_length
-commands = args.commands
-x_is_hex = args.x_is_hex
-y_is_hex = args.y_is_hex
-jump = args.jump
-
-# List of tuples that contain the input and its corresponding output. These points will eventually be plotted onto the graph.
-points = []
-
-def execute(value):
-    """ Executes some code using the given input and returns the output. """
-    # Load the binary in radare2
-    r = r2pipe.open(filename, flags=['d', 'A'])
+@dataclass(frozen=True, slots=True)
+class Config:
+    """ The options that control how each input value is executed. Passed to the worker processes so that execute() reads them from a local argument instead of from module globals. """
+    filename: str
+    start: str
+    stop: str
+    bruteforce: str
+    bruteforceIsMem: bool
+    output: str
+    outputIsMem: bool
+    input_file: str
+    input_length: int
+    output_length: int
+    commands: str
+    jump: bool
+    native: bool # True if radare2 should be loaded as a library instead of being started as a separate process
+    project: str # The name of the radare2 project that holds the saved analysis of the binary, or '' if the analysis could not be saved
+    project_functions: int # The number of functions in the saved analysis. Used to check that the project was loaded correctly.
+
+@dataclass(frozen=True, slots=True)
+class Commands:
+    """ The r2 commands that do not depend on the input value. They are built once by init_worker() so that execute() only has to add the value itself. """
+    setup: str # Reopens the program, runs to the starting point, and executes the user's commands
+    write_mem_prefix: str # Clears the input memory location and begins the write to it
+    write_mem_suffix: str # Ends the write to the input memory location
+    write_reg_prefix: str # Sets the input register
+    run: str # Continues execution and reads the output
+
+# The radare2 session that belongs to the current worker process and the commands that it runs. Both are set up once by init_worker() and reused for every value that the worker executes.
+R = None
+COMMANDS = None
+
+def open_r2(filename, native, analyze=True, debug=True):
+    """ Opens the binary in radare2 (in debug mode if debug is set) and analyzes it if necessary. If native is set and the radare2 library is available, the library is loaded directly. Otherwise radare2 is started as a separate process. """
+    # The native connector calls into libr_core instead of sending every command through a pipe
+    if(native and r2native is not None and r2native.r2lib() is not None):
+        r = r2pipe.open('ccall://' + ('dbg://' if debug else '') + filename) # The native connector ignores flags, so dbg:// is used to open the binary in debug mode
+        if(analyze):
+            r.cmd('aaa') # Same analysis as the -A flag
+        return r
+    flags = []
+    if(debug):
+        flags.append('d')
+    if(analyze):
+        flags.append('A')
+    return r2pipe.open(filename, flags=flags)
+
+def close_r2(r):
+    """ Closes a radare2 session that was opened by open_r2(). """
+    if(hasattr(r, 'native')): # r2pipe's quit() does nothing for native sessions, so the program has to be killed and libr_core has to be freed here
+        r.cmd('dk 9') # Kills the program that is being debugged
+        r.native.free()
+        r.native._o = None # r_core_free() ignores NULL, so the RCore destructor will not free the core a second time
+    else:
+        r.quit()
+
+def save_analysis(filename, native):
+    """ Analyzes the binary once and saves the analysis as a radare2 project so that the worker processes can load it instead of analyzing the binary again.
+    Returns the name of the project and the number of functions that it contains. The name is '' if the project could not be saved. """
+    # radare2 projects do not support debugged binaries, so the binary is opened without debugging it
+    project = 'codegrapher_' + str(os.getpid())
+    r = open_r2(filename, native, debug=False)
+    functions = int(r.cmd('aflc').strip() or 0)
+    r.cmd('Ps ' + project)
+    project_path = os.path.join(os.path.expanduser(r.cmd('e dir.projects').strip()), project)
+    close_r2(r)
+
+    # If the project was not saved, then each worker process will have to analyze the binary itself
+    if(not os.path.exists(project_path)):
+        print("Warning: could not save the analysis of the binary, so each process will analyze the binary itself.")
+        return '', 0
+
+    # Delete the project when the program exits
+    atexit.register(delete_project, project_path)
+    return project, functions
+
+def delete_project(project_path):
+    """ Deletes a radare2 project that was created by save_analysis(). """
+    if(os.path.isdir(project_path)): # Newer versions of r2 store each project in its own directory
+        shutil.rmtree(project_path, ignore_errors=True)
+    elif(os.path.exists(project_path)):
+        os.remove(project_path)
+
+def init_worker(cfg):
+    """ Opens the radare2 session that will be reused by every call to execute() in this worker process. """
+    global R, COMMANDS
+
+    # Load the binary in radare2 and load the analysis that was saved by save_analysis()
+    # radare2 projects do not support debugged binaries, so the project is loaded first and the binary is then reopened in debug mode
+    R = None
+    if(cfg.project != ''):
+        R = open_r2(cfg.filename, cfg.native, analyze=False, debug=False)
+        R.cmd('Po ' + cfg.project)
+        if(R.cmd('aflc').strip() == str(cfg.project_functions)): # The project was loaded if all of the functions from the saved analysis are present
+            R.cmd('doo')
+        else:
+            close_r2(R)
+            R = None
+
+    # If the analysis could not be loaded, then analyze the binary in this process
+    if(R is None):
+        R = open_r2(cfg.filename, cfg.native)
 
     # If the standard input option is set, then set use the dor command to set stdin to the given file
-    if(input_file != ''):
-        r.cmd('dor stdin=' + input_file)
+    if(cfg.input_file != ''):
+        R.cmd('dor stdin=' + cfg.input_file)
+
+    # Find out whether the binary is 32-bit or 64-bit so that the correct instruction pointer can be set
+    bits = R.cmdj('ij')['bin']['bits']
+    ip_reg = 'rip' if bits == 64 else 'eip'
 
+    # All of the commands for a value are sent to radare2 as a single script so that they only need one round-trip
     # Reopen the program and set a breakpoint at the stopping point
-    r.cmd('doo;db ' + stop)
-    if(jump): # If jump is set to true, then we will set rip to be the starting memory location
-        r.cmd('dr rip = ' + start) # One of these will work (based on whether its 32-bit or 64-bit), the other will not
-        r.cmd('dr eip = ' + start) # Since r2 will just ignore the command that doesn't work, it's okay if we just execute both of these
+    setup = ['doo', 'db ' + cfg.stop]
+    if(cfg.jump): # If jump is set to true, then we will set rip/eip to be the starting memory location
+        setup.append('dr ' + ip_reg + ' = ' + cfg.start)
     else: # Else, just set a breakpoint at that instruction and continue
-        r.cmd('db ' + start + ";dc")
+        setup.append('db ' + cfg.start)
+        setup.append('dc')
 
     # Execute any r2 commands that the user wants to have executed
-    r.cmd(commands)
+    if(cfg.commands != ''):
+        setup.append(cfg.commands)
+    setup_cmd = ';'.join(setup) + ';'
 
     # Set the register/memory location that we are bruteforcing to the value that we want it
-    if(bruteforceIsMem):
-        hex_value = hex(value)[2:] # Convert the value to hex and delete the "0x" part of it
-        r.cmd('w0 ' + input_length + " @" + bruteforce) # Clears out the memory at the location
-        r.cmd('wB 0x' + hex_value + " @" + bruteforce) # Overwrites the memory location with the value that we are bruteforcing it with
+    # The memory has to be cleared for every value, because doo restarts the program (restoring the original memory) and wB only sets bits instead of overwriting them
+    write_mem_prefix = 'w0 ' + str(cfg.input_length) + ' @' + cfg.bruteforce + ';wB 0x' # Clears out the memory at the location, then overwrites it with the value that we are bruteforcing it with
+    write_mem_suffix = ' @' + cfg.bruteforce
+    write_reg_prefix = 'dr ' + cfg.bruteforce + ' = ' # If it's a register, then we just need to use the "dr" command.
+
+    # Continue execution, then read the value of the register/memory location that needs to be checked
+    # Memory is read as JSON so that r2 hands back the number directly. Registers are read with "dr", which prints just that one register as a short hex string.
+    if(cfg.outputIsMem):
+        run_cmd = ';dc;pv' + str(cfg.output_length) + 'j @' + cfg.output
     else:
-        r.cmd('dr ' + bruteforce + ' = ' + str(value)) # If it's a register, then we just need to use the "dr" command.
+        run_cmd = ';dc;dr ' + cfg.output
+
+    COMMANDS = Commands(setup=setup_cmd, write_mem_prefix=write_mem_prefix, write_mem_suffix=write_mem_suffix, write_reg_prefix=write_reg_prefix, run=run_cmd)
 
-    # Continue execution
-    r.cmd('dc')
+    # Close radare2 when the worker process shuts down. Pool workers do not run atexit hooks, so a multiprocessing finalizer is used instead.
+    multiprocessing.util.Finalize(None, close_r2, args=(R,), exitpriority=10)
 
-    # Read the value of the register/memory location that needs to be checked and record it
-    result = 0
-    if(outputIsMem):
-        result = int(r.cmd('pv' + output_length + ' @' + output), 16)
+def execute(value, cfg, r, commands):
+    """ Executes some code in the radare2 session r using the given input and returns the corresponding output. """
+    # Set the register/memory location that we are bruteforcing to the value that we want it
+    if(cfg.bruteforceIsMem):
+        write_cmd = f"{commands.write_mem_prefix}{value:x}{commands.write_mem_suffix}" # The value is formatted as hex digits without the "0x" prefix
     else:
-        result = int(r.cmd('dr ' + output).strip(), 16)
+        write_cmd = commands.write_reg_prefix + str(value)
 
-    # Add the point to the list of points
-    points.append((value, result))
+    # Run the whole script and record the result, which is printed by the last command and is therefore on the last line of the output
+    result = r.cmd(commands.setup + write_cmd + commands.run).strip().splitlines()[-1]
+    if(cfg.outputIsMem):
+        result = json.loads(result)
+        if(isinstance(result, list)): # Some versions of r2 wrap the value in a list
+            result = result[0]
+        result = result['value']
+    else:
+        result = int(result, 16)
 
-# Use a ThreadPoolExecutor to call execute() using range(lower_bound, upper_bound, step) in a given number of threads
-with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
-    executor.map(execute, range(lower_bound, upper_bound, step))
+    return result
 
-# Print out the points in sorted order
-print("Points:")
-print(sorted(points, key=lambda x: x[0]))
+def execute_chunk(values, cfg):
+    """ Executes some code using each of the given inputs. Returns the list of outputs in the same order (None for any input that failed) and a list of error messages for the inputs that failed. """
+    r = R # The worker's session and commands are read from the module once per chunk instead of once per value
+    commands = COMMANDS
+    results = []
+    errors = []
+    for value in values:
+        try:
+            results.append(execute(value, cfg, r, commands))
+        except Exception as e: # For example, the program exited before reaching the stopping point, so there was no output to read
+            results.append(None)
+            errors.append("Warning: could not get the output for the input " + str(value) + " (" + repr(e) + "), so it will not be graphed.")
+    return results, errors
 
-# Convert the list of points into two tuples. The first tuple will contain the x values (inputs) and the second tuple will contain the y values (results). 
-# This is done to convert the points into a format that matplotlib accepts
-xy = zip(*points)
+def main():
+    """ Parses the arguments, executes the code with every value in the range, and graphs the results. """
+    # Setup the argument parser
+    parser = argparse.ArgumentParser(description="Analyzes specified lines of code by executing the code using the given input values, recording the output, and displaying the input and output in a graph.", usage='%(prog)s [options] filename start stop input output range')
+    parser.add_argument("filename", help="The name of the executable you would like to analyze.")
+    parser.add_argument("start", help="The first breakpoint will be set at this location. At the breakpoint, the input register or memory location will be changed to the next value in the range.")
+    parser.add_argument("stop", help="The second breakpoint will be set at this location. At the breakpoint, the output will be recorded.")
+    parser.add_argument("input", help="The register or memory location that contains the input value that should be bruteforced. Will be displayed on the x-axis. Example: \"eax\". If using a memory location, please specify the location using m[location]. Example: \"m[rbp-0x8]\".")
+    parser.add_argument("output", help="The register or memory location that contains the output values that should be checked after the code is executed. Will be displayed on the y-axis. Example: \"eax\". If using a memory location, please specify the location using m[location]. Example: \"m[rbp-0x8]\".")
+    parser.add_argument("range", help="The range of values that should be used for the input during the bruteforce process. Should be in the form \"[lower,upper]\" or \"[lower,upper,step]\". For example: [0,101,5] will use 0, 5, 10, ..., 95, 100 as the x values in the graph. These must be in base 10 (hexadecimal or binary will not work).")
 
-# Plot the graph
-plt.scatter(*xy)
-plt.title('Bruteforcing ' + bruteforce + ' @' + start)
-plt.xlabel(bruteforce + '\'s starting values @' + start)
-plt.ylabel(output + '\'s ending values @' + stop)
+    # Add optional arguments
+    parser.add_argument("-t", "--threads", nargs='?', dest="threads", default="5", help="The number of worker processes that will be used during execution. Default value is 5.")
+    parser.add_argument("-in", "--standard-input", nargs='?', dest='input_file', default='', help="Uses the \'dor stdin=[INPUT_FILE]\' command in radare2 to make the executable read standard input from a given file instead of having the user type it in.")
+    parser.add_argument("-il", "--input-length", nargs='?', dest='input_length', type=int, default=1, help="The amount of bytes placed at the input memory location. Default value is 1, but this will be automatically adjusted if it is too small. Is only used if the input is a memory location and not a register.")
+    parser.add_argument("-ol", "--output-length", nargs='?', dest='output_length', type=int, choices=[1, 2, 4, 8], default=1, help="The amount of bytes read at the output memory location. Must be equal to either 1, 2, 4, or 8. Default value is 1. Is only used if the output is a memory location and not a register.")
+    parser.add_argument("-e", "--execute", nargs='?', dest='commands', type=str, default='', help="Executes the given r2 commands in radare2 right after the debugger hits the first breakpoint, but before the input value is set. Example: -e \"dr ebx = 7\" will always set ebx equal to 7 at the first breakpoint. Multiple commands can be separated by a semicolon.")
+    parser.add_argument("-hx", "--x-axis-hex", dest='x_is_hex', action='store_const', const=True, default=False, help="Displays the x-axis in hexadecimal instead of denary.")
+    parser.add_argument("-hy", "--y-axis-hex", dest='y_is_hex', action='store_const', const=True, default=False, help="Displays the y-axis in hexadecimal instead of denary.")
+    parser.add_argument("-dpi", "--dpi", dest='dpi', type=int, default=150, help="The resolution (dots per inch) used to draw the points when the graph is saved to a file. The points are drawn as an image so that graphs with many points stay fast, while the axes and labels are still drawn as vectors. Default value is 150.")
+    parser.add_argument("-mp", "--max-points", dest='max_points', type=int, default=0, help="The maximum number of values that will be used from the range. If the range contains more values than this, the step will be increased so that the range only uses this many values. Default value is 0, which means that there is no limit.")
+    parser.add_argument("-g", "--graph-type", dest='graph_type', choices=['scatter', 'hexbin', 'hist2d'], default='scatter', help="The type of graph that will be used to display the results. \"scatter\" plots every point, while \"hexbin\" and \"hist2d\" group the points into bins and color each bin by the number of points inside it, which is much faster for very large ranges. Default value is scatter.")
+    parser.add_argument("-o", "--output-image", dest='output_image', default='', help="Saves the graph to the given image file instead of displaying it in a window. This does not need a display, so it can be used on servers without a GUI. The format is chosen based on the file extension (for example, .png, .pdf, or .svg).")
+    parser.add_argument("-n", "--native", dest='native', action='store_const', const=True, default=False, help="Loads radare2 as a library (using r2pipe's native connector) instead of starting it as a separate process, which avoids sending every command through a pipe. Requires the libr_core library to be installed. If it cannot be found, radare2 will be started as a separate process instead.")
+    parser.add_argument("-j", "--jump", dest='jump', action='store_const', const=True, default=False, help="Instead of running all of the code that comes before the breakpoint, if this option is set, rip/eip will immidiately be set to the start value as soon as the program opens. This will essentially jump over any code that comes before the first breakpoint, and it will make the program only execute the code between the starting and stopping breakpoints.")
 
-# Display the results in hex if necessary
-axes = plt.gca()
+    # Parse all of the arguments
+    args = parser.parse_args()
+    filename = args.filename
+    start = args.start
+    stop = args.stop
+    bruteforce = args.input
+    bruteforceIsMem = False
+    if(bruteforce.startswith("m[") and bruteforce[-1]==']'):
+        bruteforceIsMem = True
+        bruteforce = bruteforce[2:-1]
+    output = args.output
+    outputIsMem = False
+    if(output.startswith("m[") and output[-1]==']'):
+        outputIsMem = True
+        output = output[2:-1]
+    valueRange = args.range.split(",")
+    lower_bound = int(valueRange[0].split("[")[1])
+    upper_bound = valueRange[1]
+    if("]" in upper_bound):
+        upper_bound = int(upper_bound[:-1])
+    else:
+        upper_bound = int(upper_bound)
+    step = 1
+    if(len(valueRange) == 3):
+        step = int(valueRange[2][:-1])
+    threads = int(args.threads)
+    input_file = args.input_file
+    input_length = args.input_length
+    output_length = args.output_length
+    commands = args.commands
+    x_is_hex = args.x_is_hex
+    y_is_hex = args.y_is_hex
+    dpi = args.dpi
+    max_points = args.max_points
+    graph_type = args.graph_type
+    output_image = args.output_image
+    native = args.native
+    jump = args.jump
+
+    # The inputs are stored in a numpy array, so every value in the range has to fit in a signed 64-bit integer (or in an unsigned 64-bit integer if none of the values are negative)
+    # This is checked before radare2 is started so that a bad range fails right away
+    x_dtype = np.int64
+    bounds = range(lower_bound, upper_bound, step)
+    if(len(bounds) > 0):
+        smallest = min(bounds[0], bounds[-1]) # The first and last values are the extremes of the range (whether it is ascending or descending)
+        largest = max(bounds[0], bounds[-1])
+        if(-2**63 <= smallest and largest < 2**63):
+            x_dtype = np.int64
+        elif(0 <= smallest and largest < 2**64):
+            x_dtype = np.uint64
+        else:
+            parser.error("the values in the range must fit in a 64-bit integer")
+
+    # If the range contains too many values, increase the step so that at most max_points values are used
+    if(max_points > 0 and len(range(lower_bound, upper_bound, step)) > max_points):
+        step *= -(-len(range(lower_bound, upper_bound, step)) // max_points) # Multiplies the step by the number of values divided by max_points (rounded up), which keeps the user's step and also works for descending ranges
+        print("The range contains more than " + str(max_points) + " values, so the step has been increased to " + str(step) + ".")
+
+    # The range is split into chunks so that each task sent to a worker process covers several values. There are a few chunks per process so that the progress still updates regularly.
+    values = range(lower_bound, upper_bound, step)
+    chunk_size = max(1, len(values) // (threads * 4))
+
+    # Store the options that are needed to execute each value
+    # The binary is analyzed once here instead of once in each worker process. This only helps if more than one worker process will start, so otherwise the worker analyzes the binary itself.
+    project, project_functions = '', 0
+    if(threads > 1 and len(values) > chunk_size):
+        project, project_functions = save_analysis(filename, native)
+    cfg = Config(filename=filename, start=start, stop=stop, bruteforce=bruteforce, bruteforceIsMem=bruteforceIsMem, output=output, outputIsMem=outputIsMem,
+                 input_file=input_file, input_length=input_length, output_length=output_length, commands=commands, jump=jump, native=native,
+                 project=project, project_functions=project_functions)
+
+    # Bind the options to execute_chunk() so that only the input values change between calls. A partial object can be pickled and sent to the worker processes.
+    execute_worker = functools.partial(execute_chunk, cfg=cfg)
+
+    # The points are stored in two numpy arrays. The first array contains the x values (inputs) and the second array contains the y values (results).
+    # Each result is written to the same index as its input, so the points are always in sorted order. The results are read as unsigned values, so they are stored as unsigned 64-bit integers.
+    xs = np.fromiter(values, dtype=x_dtype, count=len(values))
+    ys = np.zeros(len(values), dtype=np.uint64)
+    succeeded = np.ones(len(values), dtype=bool) # Set to False for every input that failed so that it can be left out of the results
+    errors = []
+
+    # Use a ProcessPoolExecutor to call execute() using range(lower_bound, upper_bound, step) in a given number of processes
+    # Each process opens radare2 once in init_worker() and then reuses that session for all of the values that it is given
+    # The results are collected as soon as each chunk is finished so that the progress can be displayed while the bruteforce is running
+    finished = 0
+    with concurrent.futures.ProcessPoolExecutor(max_workers=threads, initializer=init_worker, initargs=(cfg,)) as executor:
+        futures = {executor.submit(execute_worker, values[i:i + chunk_size]): i for i in range(0, len(values), chunk_size)}
+        for future in concurrent.futures.as_completed(futures):
+            results, chunk_errors = future.result()
+            i = futures[future]
+            ys[i:i + len(results)] = [0 if result is None else result for result in results]
+            succeeded[i:i + len(results)] = [result is not None for result in results]
+            errors.extend(chunk_errors)
+            finished += len(results)
+            print("Progress: " + str(finished) + "/" + str(len(values)), end='\r', flush=True)
+    print()
 
-if(x_is_hex): # Displays x-axis in hex if necessary
-    xlabels = map(lambda t: '0x%08X' % int(t), axes.get_xticks())
-    axes.set_xticklabels(xlabels)
-if(y_is_hex): # Displays y-axis in hex if necessary
-    ylabels = map(lambda t: '0x%08X' % int(t), axes.get_yticks())
-    axes.set_yticklabels(ylabels)
+    # Print a warning for every input that failed, and only keep the points that succeeded
+    for error in errors:
+        print(error)
+    if(errors):
+        xs = xs[succeeded]
+        ys = ys[succeeded]
+
+    # Print out the points
+    print("Points:")
+    print(list(zip(xs.tolist(), ys.tolist())))
+
+    # If the graph is being saved to a file, use a backend that does not need a display. This must be done before pyplot is imported.
+    if(output_image != ''):
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    # Plot the graph. The points are rasterized so that large ranges do not create one vector element per point. The resolution of the rasterized points is set when the graph is saved.
+    if(graph_type == 'hexbin'):
+        plt.hexbin(xs, ys, gridsize=200, mincnt=1, rasterized=True)
+        plt.colorbar(label='Number of points')
+    elif(graph_type == 'hist2d'):
+        plt.hist2d(xs, ys, bins=200, cmin=1, rasterized=True)
+        plt.colorbar(label='Number of points')
+    else:
+        plt.scatter(xs, ys, rasterized=True)
+    plt.title('Bruteforcing ' + bruteforce + ' @' + start)
+    plt.xlabel(bruteforce + '\'s starting values @' + start)
+    plt.ylabel(output + '\'s ending values @' + stop)
+
+    # Display the results in hex if necessary
+    # A formatter is used so that the labels are regenerated whenever the ticks change (for example, after zooming or panning)
+    axes = plt.gca()
+    hex_formatter = ticker.FuncFormatter(lambda t, pos: '0x%08X' % int(t))
+
+    if(x_is_hex): # Displays x-axis in hex if necessary
+        axes.xaxis.set_major_formatter(hex_formatter)
+    if(y_is_hex): # Displays y-axis in hex if necessary
+        axes.yaxis.set_major_formatter(hex_formatter)
+
+    # Save or show the results
+    if(output_image != ''):
+        plt.savefig(output_image, dpi=dpi)
+    else:
+        plt.show()
 
-# Show the results
-plt.show()
+if __name__ == "__main__":
+    main()